@@ -0,0 +1,117 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+import requests
+from config import (
+    AI_NAME, AI_NAME_VARIANTS, ADDRESSEE_MATCH_THRESHOLD,
+    ADDRESSEE_CLASSIFIER_MODEL, LLM_API_URL,
+)
+from logger import logger
+from metrics import metrics
+
+# Finnish case endings and clitics allowed after the name ("Juhalle", "Juhakin"),
+# written the way phonetic_key() reduces them (double letters collapsed).
+NAME_SUFFIXES = ("n", "a", "le", "lta", "la", "sta", "sa", "na", "ksi", "kin", "ko", "s")
+
+# Names shorter than this must match exactly; a single typo in a short name
+# already turns it into a different common word ("juha" -> "juhla").
+MIN_FUZZY_NAME_LENGTH = 6
+
+def phonetic_key(word: str) -> str:
+    """
+    Reduces a word to a rough phonetic key so that common Whisper spellings of
+    the same spoken name compare equal (e.g. "Juuha", "Yuha" and "Juha").
+    """
+    word = unicodedata.normalize("NFKD", word.lower())
+    word = "".join(c for c in word if not unicodedata.combining(c))
+    word = re.sub(r"[^a-z]", "", word)
+    # English-style spellings of Finnish sounds
+    word = re.sub(r"^y(?=[aeiou])", "j", word)
+    word = word.replace("w", "v").replace("ou", "u").replace("ck", "k").replace("c", "k")
+    # Collapse long vowels and double consonants: "juuha" -> "juha"
+    word = re.sub(r"(.)\1+", r"\1", word)
+    return word
+
+class AddresseeGate:
+    """
+    Cheap local check of whether a message is addressed to the AI, used in
+    discussion mode to avoid sending every message to the LLM.
+    Matches the AI name phonetically, followed by nothing or a case ending
+    (e.g. "Juhalle"), and optionally asks a small classifier model otherwise.
+    """
+    def __init__(self):
+        logger.info("AddresseeGate: Initializing addressee gate.")
+        self.name_keys = {phonetic_key(name) for name in [AI_NAME] + AI_NAME_VARIANTS}
+        self.name_keys.discard("")
+        self.threshold = ADDRESSEE_MATCH_THRESHOLD
+        self.classifier_model = ADDRESSEE_CLASSIFIER_MODEL
+
+        # Stats
+        self.messages_checked = 0
+        self.name_matches = 0
+        self.classifier_accepts = 0
+        self.llm_calls_avoided = 0
+
+    def word_matches_name(self, word: str) -> bool:
+        key = phonetic_key(word)
+        if not key:
+            return False
+        stems = {key} | {key[:-len(suffix)] for suffix in NAME_SUFFIXES if key.endswith(suffix)}
+        for name_key in self.name_keys:
+            if name_key in stems:
+                return True
+            # Long names also tolerate a misspelled letter or two.
+            if len(name_key) >= MIN_FUZZY_NAME_LENGTH and any(
+                SequenceMatcher(None, stem, name_key).ratio() >= self.threshold for stem in stems
+            ):
+                return True
+        return False
+
+    def mentions_name(self, message: str) -> bool:
+        return any(self.word_matches_name(word) for word in message.split())
+
+    def classify(self, message: str) -> bool:
+        """Asks the optional small classifier model whether the message is meant for the AI."""
+        prompt = (
+            f"Your assistant is called {AI_NAME}. Is the following message spoken to the assistant, "
+            f"asking it something or expecting it to answer? Answer only yes or no.\n\n"
+            f"Message: {message}\nAnswer:"
+        )
+        payload = {
+            "model": self.classifier_model,
+            "prompt": prompt,
+            "stream": False,
+            "options": {"num_predict": 3, "temperature": 0},
+        }
+        try:
+            response = requests.post(LLM_API_URL, json=payload, timeout=5)
+            response.raise_for_status()
+            answer = response.json().get("response", "").strip().lower()
+            logger.debug(f"AddresseeGate: Classifier answered: {answer}")
+            return answer.startswith(("yes", "kyl"))
+        except requests.exceptions.RequestException as e:
+            logger.error(f"AddresseeGate: Error communicating with classifier: {e}")
+            # When unsure, let the main LLM decide.
+            return True
+
+    def should_prompt(self, message: str) -> bool:
+        """Returns True if the message should be sent to the LLM."""
+        self.messages_checked += 1
+        if self.mentions_name(message):
+            self.name_matches += 1
+            logger.info("AddresseeGate: AI name mentioned; prompting LLM.")
+            return True
+        if self.classifier_model and self.classify(message):
+            self.classifier_accepts += 1
+            logger.info("AddresseeGate: Classifier accepted message; prompting LLM.")
+            return True
+        self.llm_calls_avoided += 1
+        metrics.inc("addressee_llm_calls_avoided_total")
+        logger.info(f"AddresseeGate: Message not addressed to AI; skipping LLM. {self.stats_summary()}")
+        return False
+
+    def stats_summary(self) -> str:
+        return (
+            f"checked={self.messages_checked} name_matches={self.name_matches} "
+            f"classifier_accepts={self.classifier_accepts} llm_calls_avoided={self.llm_calls_avoided}"
+        )
@@ -0,0 +1,97 @@
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from logger import logger
+
+# Header layout: [write_pos, read_pos] as monotonically increasing frame counters.
+HEADER_FIELDS = 2
+HEADER_BYTES = HEADER_FIELDS * np.dtype(np.int64).itemsize
+
+class AudioRingBuffer:
+    """
+    Single-producer / single-consumer ring buffer of mono audio frames
+    backed by multiprocessing.shared_memory, so audio can move between
+    processes without pickling it through a queue.
+    """
+    def __init__(self, name: str = None, capacity: int = 0, dtype: str = "float32", create: bool = False):
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        if create:
+            size = HEADER_BYTES + capacity * self.dtype.itemsize
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            logger.debug(f"AudioRingBuffer: Created shared memory '{self.shm.name}' ({capacity} frames of {self.dtype}).")
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            logger.debug(f"AudioRingBuffer: Attached to shared memory '{self.shm.name}'.")
+        self.owner = create
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray((capacity,), dtype=self.dtype, buffer=self.shm.buf, offset=HEADER_BYTES)
+        if create:
+            self.header[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def __getstate__(self):
+        # Only the handle travels to the child process; it re-attaches there.
+        return {"name": self.shm.name, "capacity": self.capacity, "dtype": self.dtype.str}
+
+    def __setstate__(self, handle):
+        self.__init__(name=handle["name"], capacity=handle["capacity"], dtype=handle["dtype"], create=False)
+
+    def available(self) -> int:
+        """Number of frames ready to be read."""
+        return int(self.header[0] - self.header[1])
+
+    def free_space(self) -> int:
+        return self.capacity - self.available()
+
+    def write(self, frames: np.ndarray, block: bool = True, should_stop=None) -> int:
+        """
+        Writes frames into the ring. When block is True, waits for the reader
+        to make room; otherwise frames that do not fit are dropped.
+        Returns the number of frames written.
+        """
+        frames = np.ascontiguousarray(frames, dtype=self.dtype).reshape(-1)
+        written = 0
+        while written < len(frames):
+            space = self.free_space()
+            if space == 0:
+                if not block or (should_stop and should_stop()):
+                    break
+                time.sleep(0.005)
+                continue
+            count = min(space, len(frames) - written)
+            start = int(self.header[0] % self.capacity)
+            first = min(count, self.capacity - start)
+            self.data[start:start + first] = frames[written:written + first]
+            self.data[:count - first] = frames[written + first:written + count]
+            written += count
+            # Publish the new write position only after the frames are in place.
+            self.header[0] += count
+        if written < len(frames):
+            logger.debug(f"AudioRingBuffer: Dropped {len(frames) - written} frames (buffer full).")
+        return written
+
+    def read(self, max_frames: int) -> np.ndarray:
+        """Reads up to max_frames frames; returns an empty array if none are available."""
+        count = min(self.available(), max_frames)
+        if count <= 0:
+            return np.empty(0, dtype=self.dtype)
+        start = int(self.header[1] % self.capacity)
+        first = min(count, self.capacity - start)
+        out = np.empty(count, dtype=self.dtype)
+        out[:first] = self.data[start:start + first]
+        out[first:] = self.data[:count - first]
+        self.header[1] += count
+        return out
+
+    def close(self):
+        # Drop numpy views before closing, otherwise the mapping stays exported.
+        self.header = None
+        self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+            logger.debug(f"AudioRingBuffer: Unlinked shared memory '{self.shm.name}'.")
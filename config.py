@@ -3,9 +3,30 @@ AUDIO_DEVICE_INPUT_ID = 1     # Adjust to your actual device ID for input (where
 AUDIO_DEVICE_OUTPUT_ID = 32    # Adjust to your actual device ID for output (where does the AI speak to)
 WHISPER_MODEL = "turbo"  # Model for STT
 
+# Process configuration
+USE_WORKER_PROCESSES = False  # Run STT and TTS in dedicated worker processes instead of threads
+STT_SAMPLE_RATE = 16000  # Capture rate used when the input device's default rate cannot be queried
+AUDIO_RING_SECONDS = 30  # Capacity of the shared-memory audio ring buffers, in seconds
+
 VOICE_SAMPLE_WAV = "./voice-data/ref_fin.wav"  # Path to the voice sample for TTS
 VOICE_SAMPLE_TXT = "./voice-data/ref_fin.txt"  # Path to the text sample for F5-TTS
 VOCAB_TXT = "./voice-data/vocab_fin.txt"  # Vocabulary file for F5-TTS
+VOICE_CACHE_DIR = "./voice-data/cache"  # Speaker conditioning cache, keyed by voice sample content
+VOICE_PRELOAD = []  # Extra (wav, txt) voice samples to prepare at startup for fast switching
+
+# TTS text segmentation
+TTS_DEFAULT_LANGUAGE = "fi"  # Language used for number/abbreviation expansion when it cannot be detected
+TTS_FIRST_SEGMENT_MAX_WORDS = 6  # Max words in the first segment (a longer first clause is cut) so the first audio starts quickly
+TTS_SEGMENT_MAX_CHARS = {  # Size of the following segments, per engine
+    "piper": 200,
+    "f5tts": 300,
+    "coqui": 250,
+}
+
+# Metrics endpoint (Prometheus text format at http://METRICS_HOST:METRICS_PORT/metrics)
+METRICS_ENABLED = True
+METRICS_HOST = "127.0.0.1"  # Keep local; expose through a reverse proxy if scraping from elsewhere
+METRICS_PORT = 9464
 
 # LLM configuration
 LLM_API_URL = "http://localhost:11434/api/generate"  # Example local Ollama instance
@@ -20,6 +41,11 @@ AI_MODE = AI_MODE_CONVERSATION  # or AI_MODE_DISCUSSION
 
 AI_NAME = "Juha"
 
+# Discussion mode addressee gate: messages that do not mention the AI are not sent to the LLM
+AI_NAME_VARIANTS = ["Juho", "Jucha"]  # Known Whisper misspellings of AI_NAME
+ADDRESSEE_MATCH_THRESHOLD = 0.8  # Fuzzy match ratio (0-1) for names of 6+ letters; shorter names must match exactly
+ADDRESSEE_CLASSIFIER_MODEL = None  # Optional small Ollama model for messages without the name, e.g. "qwen2.5:0.5b"
+
 # A system prompt to guide the AI’s style and behavior; we incorporate the modes.
 SYSTEM_PROMPT = (
     "You are {AI_NAME}, an AI assistant."
@@ -1,6 +1,8 @@
+import time
 import requests
 from config import LLM_API_URL, LLM_MODEL, OLLAMA_JSON_SCHEMA
 from logger import logger
+from metrics import metrics
 
 class LLMModule:
     def generate_response(prompt: str) -> str:
@@ -8,6 +10,8 @@ class LLMModule:
         Sends a prompt to the LLM and retrieves the response.
         """
         logger.debug("LLMModule: AI is now thinking.")
+        metrics.inc("llm_calls_total", kind="text")
+        start = time.time()
 
         try:
             payload = {
@@ -22,13 +26,17 @@ class LLMModule:
             data = response.json()
             ai_response = data.get("response", "")
             logger.debug(f"LLMModule: Received response: {ai_response}")
+            metrics.mark_used("llm")
         except requests.exceptions.RequestException as e:
             logger.error(f"LLMModule: Error communicating with LLM API: {e}")
+            metrics.inc("llm_failures_total", reason="request")
             ai_response = "(Error retrieving response)"
         except KeyError:
             logger.error("LLMModule: Unexpected response format from LLM API.")
+            metrics.inc("llm_failures_total", reason="invalid_response")
             ai_response = "(Error retrieving response)"
         finally:
+            metrics.inc("llm_request_seconds_total", time.time() - start)
             logger.debug("LLMModule: AI has stopped thinking.")
 
         return ai_response
@@ -51,6 +59,8 @@ class LLMModule:
         }
         logger.info("LLMModule: Sending JSON prompt to LLM.")
         logger.debug(f"LLMModule: Payload: {payload}")
+        metrics.inc("llm_calls_total", kind="json")
+        start = time.time()
 
         try:
             response = requests.post(LLM_API_URL, json=payload, timeout=30)
@@ -65,14 +75,20 @@ class LLMModule:
             # If the model returns invalid JSON, handle it gracefully.
             import json
             parsed = json.loads(raw_json_str)
+            metrics.mark_used("llm")
             return parsed
 
         except requests.exceptions.RequestException as e:
             logger.error(f"LLMModule: Error communicating with LLM API: {e}")
+            metrics.inc("llm_failures_total", reason="request")
         except (KeyError, json.JSONDecodeError) as e:
             logger.error(f"LLMModule: Unexpected/invalid JSON response: {e}")
+            metrics.inc("llm_failures_total", reason="invalid_json")
+        finally:
+            metrics.inc("llm_request_seconds_total", time.time() - start)
 
         # Fallback
+        metrics.inc("llm_json_fallbacks_total")
         return {
             "wantsToSpeak": False,
             "reply": "(Error retrieving JSON)",
@@ -2,16 +2,22 @@ import threading
 import time
 import signal
 from logger import logger
-from config import AI_NAME
-from state import State
+from config import AI_NAME, USE_WORKER_PROCESSES, METRICS_ENABLED, METRICS_HOST, METRICS_PORT, LLM_API_URL, LLM_MODEL
+from state import State, SharedState
 from stt_realtimestt import STTModule
 from tts_realtimetts import TTSModule
 from tts_f5tts import F5TTSModule
 from tts_piper import PiperTTSModule
 from orchestrator import Orchestrator
+from metrics import (
+    metrics, MetricsServer, collect_process, state_collector, liveness_collector, llm_residency_collector,
+    worker_process_collector,
+)
 
 def main():
     logger.info("Main: Starting the system.")
+    if USE_WORKER_PROCESSES:
+        return main_with_workers()
     state = State()
 
     logger.info("Main: Creating modules.")
@@ -31,6 +37,40 @@ def main():
     tts_thread.start()
     orchestrator_thread.start()
 
+    start_metrics(state, [stt_thread, tts_thread, orchestrator_thread])
+    wait_for_shutdown(state, tts_module)
+
+def main_with_workers():
+    from workers import WorkerProcesses
+    state = SharedState()
+
+    logger.info("Main: Starting STT and TTS worker processes.")
+    workers = WorkerProcesses(state, PiperTTSModule)
+    tts_module = workers.tts_proxy
+    orchestrator = Orchestrator(state, tts_module)
+    workers.start()
+
+    orchestrator_thread = threading.Thread(target=orchestrator.run, name="OrchestratorThread", daemon=True)
+    orchestrator_thread.start()
+
+    start_metrics(state, workers.processes + workers.threads + [orchestrator_thread], workers.processes)
+    try:
+        wait_for_shutdown(state, tts_module)
+    finally:
+        workers.stop()
+
+def start_metrics(state: State, runners: list, processes: list = ()):
+    if not METRICS_ENABLED:
+        return
+    metrics.add_collector(state_collector(state))
+    metrics.add_collector(liveness_collector(runners))
+    metrics.add_collector(collect_process)
+    if processes:
+        metrics.add_collector(worker_process_collector(processes))
+    metrics.add_collector(llm_residency_collector(LLM_API_URL, LLM_MODEL))
+    MetricsServer(METRICS_HOST, METRICS_PORT).start()
+
+def wait_for_shutdown(state: State, tts_module):
     # Handle Ctrl+C
     def signal_handler(sig, frame):
         logger.info("Main: Caught Ctrl+C, requesting shutdown...")
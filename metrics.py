@@ -0,0 +1,234 @@
+import os
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logger import logger
+
+class Metrics:
+    """
+    Minimal thread-safe registry of counters and gauges, rendered in the
+    Prometheus text exposition format. Collectors are callbacks that refresh
+    gauges (queue depths, thread liveness, ...) right before each scrape.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.types = {}
+        self.help = {}
+        self.values = {}
+        self.collectors = []
+        self.warmups = {}
+        self.last_used = {}
+        self.started = time.time()
+
+    def describe(self, name: str, metric_type: str, help_text: str):
+        with self.lock:
+            self.types[name] = metric_type
+            self.help[name] = help_text
+
+    # name and value are positional-only so that labels may use any name, e.g. name=
+    def inc(self, name: str, value: float = 1, /, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name: str, value: float, /, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = value
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def mark_warmup(self, model: str):
+        """Records that a model was (re)loaded."""
+        self.warmups[model] = time.time()
+
+    def mark_used(self, model: str):
+        """Records that a model served a request."""
+        self.last_used[model] = time.time()
+
+    def observe_tts(self, synthesis_seconds: float, audio_seconds: float):
+        self.inc("tts_synthesis_seconds_total", synthesis_seconds)
+        self.inc("tts_audio_seconds_total", audio_seconds)
+        self.inc("tts_segments_total")
+        if audio_seconds > 0:
+            self.set("tts_realtime_factor", synthesis_seconds / audio_seconds)
+
+    def collect(self):
+        for collector in self.collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                logger.warning(f"Metrics: Collector {collector.__name__} failed: {e}")
+        now = time.time()
+        for model, timestamp in self.warmups.items():
+            self.set("model_seconds_since_warmup", now - timestamp, model=model)
+        for model, timestamp in self.last_used.items():
+            self.set("model_seconds_since_last_use", now - timestamp, model=model)
+        self.set("process_uptime_seconds", now - self.started)
+
+    def render(self) -> str:
+        self.collect()
+        lines = []
+        with self.lock:
+            names = sorted({name for name, _ in self.values})
+            for name in names:
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                    lines.append(f"# TYPE {name} {self.types[name]}")
+                for (key_name, labels), value in sorted(self.values.items()):
+                    if key_name != name:
+                        continue
+                    label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+metrics.describe("assistant_turns_total", "counter", "Turns handled by the orchestrator, by trigger.")
+metrics.describe("assistant_replies_spoken_total", "counter", "Replies the AI chose to speak.")
+metrics.describe("addressee_llm_calls_avoided_total", "counter", "Discussion-mode messages not sent to the LLM.")
+metrics.describe("llm_calls_total", "counter", "Requests sent to the LLM, by kind.")
+metrics.describe("llm_failures_total", "counter", "Failed LLM requests, by reason.")
+metrics.describe("llm_json_fallbacks_total", "counter", "JSON requests answered with the (Error retrieving JSON) fallback.")
+metrics.describe("llm_request_seconds_total", "counter", "Total time spent waiting for the LLM.")
+metrics.describe("llm_model_resident", "gauge", "1 if the LLM model is loaded in Ollama.")
+metrics.describe("tts_synthesis_seconds_total", "counter", "Total time spent synthesizing speech.")
+metrics.describe("tts_audio_seconds_total", "counter", "Total duration of synthesized speech.")
+metrics.describe("tts_segments_total", "counter", "Text segments synthesized.")
+metrics.describe("tts_realtime_factor", "gauge", "Synthesis time divided by audio duration for the last segment.")
+metrics.describe("state_pending_messages", "gauge", "Transcribed messages waiting for the orchestrator.")
+metrics.describe("state_flag", "gauge", "Conversation state flags (1 = set).")
+metrics.describe("thread_alive", "gauge", "1 if the module thread or worker process is alive.")
+metrics.describe("process_resident_memory_bytes", "gauge", "Resident set size, by process (main or worker).")
+metrics.describe("process_cpu_seconds_total", "counter", "CPU time used, by process (main or worker).")
+metrics.describe("process_cpu_percent", "gauge", "CPU usage since the previous scrape, by process (main or worker).")
+metrics.describe("model_seconds_since_warmup", "gauge", "Seconds since the model was last loaded.")
+metrics.describe("model_seconds_since_last_use", "gauge", "Seconds since the model last answered a request.")
+metrics.describe("process_uptime_seconds", "gauge", "Seconds since the metrics registry was created.")
+
+# Start the counters we alert on at zero so their series exist before the first event
+for kind in ("text", "json"):
+    metrics.inc("llm_calls_total", 0, kind=kind)
+for reason in ("request", "invalid_json"):
+    metrics.inc("llm_failures_total", 0, reason=reason)
+for trigger in ("message", "silence"):
+    metrics.inc("assistant_turns_total", 0, trigger=trigger)
+metrics.inc("llm_json_fallbacks_total", 0)
+metrics.inc("assistant_replies_spoken_total", 0)
+
+def read_process(m: Metrics, process, label: str):
+    """Sets the RSS and CPU series of a psutil.Process under process=label."""
+    cpu = process.cpu_times()
+    m.set("process_cpu_seconds_total", cpu.user + cpu.system, process=label)
+    m.set("process_cpu_percent", process.cpu_percent(interval=None), process=label)
+    m.set("process_resident_memory_bytes", process.memory_info().rss, process=label)
+
+def collect_process(m: Metrics):
+    """Main process RSS and CPU usage; uses psutil when it is installed."""
+    try:
+        import psutil
+    except ImportError:
+        cpu = os.times()
+        m.set("process_cpu_seconds_total", cpu.user + cpu.system, process="main")
+        try:
+            import resource
+            # ru_maxrss is the peak RSS, in kilobytes on Linux
+            m.set("process_resident_memory_bytes", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+                  process="main")
+        except ImportError:
+            pass
+        return
+    process = getattr(collect_process, "process", None) or psutil.Process()
+    collect_process.process = process
+    read_process(m, process, "main")
+
+def worker_process_collector(processes):
+    """RSS and CPU usage of the worker processes, labelled by process name; needs psutil."""
+    # cpu_percent() measures since the previous call on the same object, so keep one per PID
+    handles = {}
+
+    def collect_worker_processes(m: Metrics):
+        try:
+            import psutil
+        except ImportError:
+            return
+        for worker in processes:
+            if not worker.is_alive():
+                continue
+            handle = handles.get(worker.pid)
+            if handle is None:
+                handle = handles[worker.pid] = psutil.Process(worker.pid)
+            try:
+                read_process(m, handle, worker.name)
+            except psutil.NoSuchProcess:
+                handles.pop(worker.pid, None)
+    return collect_worker_processes
+
+def state_collector(state):
+    def collect_state(m: Metrics):
+        m.set("state_pending_messages", len(state.new_messages))
+        for flag in ("user_talking", "ai_talking", "ai_thinking", "system_ready"):
+            m.set("state_flag", int(getattr(state, flag)), flag=flag)
+    return collect_state
+
+def liveness_collector(runners):
+    """runners are threads or processes; both expose name and is_alive()."""
+    def collect_liveness(m: Metrics):
+        for runner in runners:
+            m.set("thread_alive", int(runner.is_alive()), name=runner.name)
+    return collect_liveness
+
+def llm_residency_collector(api_url: str, model: str):
+    """Asks Ollama which models are loaded (GET /api/ps)."""
+    import requests
+    ps_url = api_url.rsplit("/api/", 1)[0] + "/api/ps"
+
+    def collect_llm_residency(m: Metrics):
+        try:
+            response = requests.get(ps_url, timeout=1)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            # Ollama being down is a normal reading, not a broken collector.
+            logger.debug(f"Metrics: Could not reach Ollama at {ps_url}: {e}")
+            m.set("llm_model_resident", 0, model=model)
+            return
+        loaded = {entry.get("name") for entry in response.json().get("models", [])}
+        m.set("llm_model_resident", int(model in loaded), model=model)
+    return collect_llm_residency
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"MetricsServer: {self.address_string()} {format % args}")
+
+class MetricsServer:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.server = None
+
+    def start(self):
+        try:
+            self.server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+        except OSError as e:
+            logger.error(f"MetricsServer: Could not bind {self.host}:{self.port}: {e}")
+            return
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="MetricsThread", daemon=True).start()
+        logger.info(f"MetricsServer: Serving metrics at http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
@@ -5,12 +5,15 @@ from llm import LLMModule
 from tts_realtimetts import TTSModule
 from logger import logger
 from prompter import Prompter
+from addressee import AddresseeGate
+from metrics import metrics
 
 class Orchestrator:
     def __init__(self, state: State, tts_module: TTSModule):
         logger.info("Orchestrator: Initializing orchestrator module.")
         self.state = state
         self.tts_module = tts_module
+        self.addressee_gate = AddresseeGate() if AI_MODE == AI_MODE_DISCUSSION else None
 
     def run(self):
         logger.info("Orchestrator: Starting orchestrator module.")
@@ -28,6 +31,7 @@ class Orchestrator:
                 elif silence_elapsed:
                     logger.info("Orchestrator: Silence threshold reached, generating response.")
                     self.state.last_message_timestamp = time.time()
+                    metrics.inc("assistant_turns_total", trigger="silence")
                     self.prompt_llm("... (long silence)")
 
             time.sleep(0.1)
@@ -37,6 +41,10 @@ class Orchestrator:
         self.state.new_messages.clear()
         consolidated_message = " ".join(user_messages)
         logger.info(f"Orchestrator: Consolidated user message: {consolidated_message}")
+        metrics.inc("assistant_turns_total", trigger="message")
+        # The messages are already in short-term memory, so skipping the LLM keeps them as context.
+        if self.addressee_gate and not self.addressee_gate.should_prompt(consolidated_message):
+            return
         self.prompt_llm(consolidated_message)
 
     def prompt_llm(self, last_user_message: str):
@@ -60,6 +68,7 @@ class Orchestrator:
             if len(self.state.short_term) > 10:
                 removed = self.state.short_term.pop(0)
                 logger.debug(f"Orchestrator: Removed oldest short-term memory: {removed}")
+            metrics.inc("assistant_replies_spoken_total")
             self.tts_module.speak(reply_text)
             logger.info("Orchestrator: AI response spoken.")
         else:
@@ -34,3 +34,72 @@ class State:
         if len(self.short_term) > 10:
             removed = self.short_term.pop(0)
             logger.debug(f"State: Removed oldest short-term message: {removed}")
+
+class SharedState(State):
+    """
+    State whose flags live in shared memory so that worker processes see the
+    same values as the main process. Messages transcribed in a worker are
+    forwarded to the main process through a queue, where pump_messages()
+    adds them to the real conversation memory.
+    """
+    SHARED_FLAGS = ("shutdown", "system_ready", "user_talking", "ai_talking", "ai_thinking")
+
+    def __init__(self, context=None):
+        import multiprocessing
+        # Worker processes must be spawned: the mirror is set up when the state is
+        # unpickled in the child, and fork does not pickle process arguments.
+        context = context or multiprocessing.get_context("spawn")
+        self._flags = {name: context.Value('b', False) for name in self.SHARED_FLAGS}
+        self._timestamp = context.Value('d', time.time())
+        self.message_queue = context.Queue()
+        self.is_mirror = False
+        super().__init__()
+
+    def __getstate__(self):
+        # Worker processes get the shared values and queue, not the local memory.
+        return {"_flags": self._flags, "_timestamp": self._timestamp, "message_queue": self.message_queue}
+
+    def __setstate__(self, shared):
+        self.__dict__.update(shared)
+        self.is_mirror = True
+        self.new_messages = []
+        self.short_term = []
+        self.user_message_count = 0
+        logger.debug("State: Attached to shared state in worker process.")
+
+    def __getattr__(self, name):
+        # Only called when normal lookup fails, i.e. for the shared flags.
+        flags = self.__dict__.get("_flags")
+        if flags is not None and name in flags:
+            return bool(flags[name].value)
+        if name == "last_message_timestamp" and "_timestamp" in self.__dict__:
+            return self._timestamp.value
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if name in self.SHARED_FLAGS and "_flags" in self.__dict__:
+            self._flags[name].value = bool(value)
+        elif name == "last_message_timestamp" and "_timestamp" in self.__dict__:
+            self._timestamp.value = value
+        else:
+            super().__setattr__(name, value)
+
+    def add_new_message(self, message: str):
+        """Add a new user message, forwarding it to the main process from a worker."""
+        if self.is_mirror:
+            self.last_message_timestamp = time.time()
+            self.message_queue.put(message)
+            logger.debug(f"State: Forwarded new message to main process: {message}")
+        else:
+            super().add_new_message(message)
+
+    def pump_messages(self):
+        """Moves messages forwarded by worker processes into the main state."""
+        import queue
+        logger.info("State: Starting message pump for worker processes.")
+        while not self.shutdown:
+            try:
+                message = self.message_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            super().add_new_message(message)
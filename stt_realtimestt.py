@@ -1,20 +1,26 @@
 import time
 import logging
+import threading
 from state import State
 from config import AUDIO_DEVICE_INPUT_ID, WHISPER_MODEL
 from RealtimeSTT import AudioToTextRecorder
 import traceback
 from logger import logger
+from metrics import metrics
 
 class STTModule:
-    def __init__(self, state: State):
+    def __init__(self, state: State, audio_ring=None, audio_sample_rate: int = 16000):
         logger.info("STTModule: Initializing STT module.")
         self.state = state
+        # When an audio ring is given, microphone audio is captured elsewhere
+        # (see workers.MicrophoneCapture) and fed to the recorder from the ring.
+        self.audio_ring = audio_ring
+        self.audio_sample_rate = audio_sample_rate
 
         recorder_config = {
             'spinner': False,
             'model': WHISPER_MODEL,
-            'use_microphone': True,
+            'use_microphone': audio_ring is None,
             'input_device_index': AUDIO_DEVICE_INPUT_ID,
             'silero_sensitivity': 0.6,
             'silero_use_onnx': True,
@@ -34,6 +40,7 @@ class STTModule:
         try:
             self.recorder = AudioToTextRecorder(**recorder_config)
             logger.info("STTModule: Recorder initialized successfully.")
+            metrics.mark_warmup("stt")
         except Exception as e:
             logger.error(f"STTModule: Failed to initialize AudioToTextRecorder: {e}")
             self.recorder = None
@@ -64,8 +71,27 @@ class STTModule:
         self.state.add_new_message(text)
         logger.debug("STTModule: Added new message to state.")
 
+    def feed_audio(self):
+        logger.info("STTModule: Feeding audio from shared ring buffer.")
+        while not self.state.shutdown:
+            chunk = self.audio_ring.read(1024)
+            if len(chunk) == 0:
+                time.sleep(0.01)
+                continue
+            if self.recorder:
+                # The recorder resamples to the 16 kHz it transcribes at
+                self.recorder.feed_audio(chunk.tobytes(), original_sample_rate=self.audio_sample_rate)
+        if self.recorder:
+            # run() is blocked in recorder.text(); abort() makes it return so the
+            # worker process can shut the recorder down and exit on its own.
+            self.recorder.abort()
+
     def run(self):
         logger.info("STTModule: Running STT module.")
+        feed_thread = None
+        if self.audio_ring is not None:
+            feed_thread = threading.Thread(target=self.feed_audio, name="STTFeedThread", daemon=True)
+            feed_thread.start()
         try:
             while not self.state.shutdown:
                 if self.recorder:
@@ -75,4 +101,9 @@ class STTModule:
             logger.error(f"STTModule: Error during transcription: {e}")
             logger.debug(traceback.format_exc())
         finally:
+            if feed_thread is not None:
+                feed_thread.join()
+                if self.recorder:
+                    # Stops the recorder's own transcription and VAD processes
+                    self.recorder.shutdown()
             logger.info("STTModule: Exiting STT module.")
@@ -0,0 +1,311 @@
+import re
+from config import TTS_DEFAULT_LANGUAGE, TTS_FIRST_SEGMENT_MAX_WORDS
+from logger import logger
+
+FI_ONES = ["nolla", "yksi", "kaksi", "kolme", "neljä", "viisi", "kuusi", "seitsemän", "kahdeksan", "yhdeksän"]
+EN_ONES = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+           "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+           "seventeen", "eighteen", "nineteen"]
+EN_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+
+# Ordinals for reading dates: the day in the nominative, the month in the partitive
+# ("1.5." -> "ensimmäinen viidettä").
+FI_ORDINALS = ["", "ensimmäinen", "toinen", "kolmas", "neljäs", "viides", "kuudes", "seitsemäs",
+               "kahdeksas", "yhdeksäs", "kymmenes"]
+FI_ORDINAL_STEMS = ["", "yhdes", "kahdes", "kolmas", "neljäs", "viides", "kuudes", "seitsemäs",
+                    "kahdeksas", "yhdeksäs"]
+FI_MONTH_ORDINALS = ["", "ensimmäistä", "toista", "kolmatta", "neljättä", "viidettä", "kuudetta",
+                     "seitsemättä", "kahdeksatta", "yhdeksättä", "kymmenettä", "yhdettätoista", "kahdettatoista"]
+EN_ORDINALS = {1: "first", 2: "second", 3: "third", 5: "fifth", 8: "eighth", 9: "ninth", 12: "twelfth"}
+EN_MONTHS = ["", "January", "February", "March", "April", "May", "June", "July",
+             "August", "September", "October", "November", "December"]
+
+FI_ABBREVIATIONS = {
+    "esim.": "esimerkiksi",
+    "mm.": "muun muassa",
+    "jne.": "ja niin edelleen",
+    "ns.": "niin sanottu",
+    "n.": "noin",
+    "yms.": "ynnä muuta sellaista",
+    "ym.": "ynnä muuta",
+    "ts.": "toisin sanoen",
+    "klo": "kello",
+    "tri": "tohtori",
+    "km": "kilometriä",
+    "kg": "kiloa",
+    "€": "euroa",
+    "%": "prosenttia",
+}
+EN_ABBREVIATIONS = {
+    "e.g.": "for example",
+    "i.e.": "that is",
+    "etc.": "et cetera",
+    "vs.": "versus",
+    "mr.": "mister",
+    "mrs.": "missus",
+    "dr.": "doctor",
+    "approx.": "approximately",
+    "km": "kilometers",
+    "kg": "kilograms",
+    "€": "euros",
+    "$": "dollars",
+    "%": "percent",
+}
+
+UNIT_SYMBOLS = {"%", "€", "$"}
+# Common function words for language detection; words spelled the same in both
+# languages ("on", "me", "he", "no") are left out. Any of äöå already means Finnish.
+FINNISH_HINTS = {
+    "ja", "ei", "se", "ne", "kun", "jos", "tai", "kuin", "mutta", "sekä", "vai", "siis", "myös", "vain",
+    "minä", "mina", "sinä", "sina", "hän", "han", "te", "minun", "sinun", "meidän", "heidän", "mitä", "mita",
+    "mikä", "mika", "kuka", "missä", "missa", "miksi", "miten", "milloin", "paljonko", "kello",
+    "oli", "olen", "olet", "ovat", "olla", "ole", "olisi", "voi", "voit", "pitää", "pitaa", "tulee",
+    "tämä", "tama", "tuo", "nyt", "sitten", "vielä", "viela", "jo", "kyllä", "kylla", "niin", "hei",
+    "moi", "kiitos", "anteeksi", "noin", "yli", "alle", "vuonna", "oikein", "hyvä", "hyva", "tänään",
+}
+ENGLISH_HINTS = {
+    "the", "a", "an", "and", "or", "but", "if", "of", "to", "in", "at", "by", "for", "with", "from",
+    "about", "into", "over", "after", "before", "is", "are", "was", "were", "be", "been", "am", "has",
+    "have", "had", "do", "does", "did", "will", "would", "can", "could", "should", "i", "you", "she",
+    "it", "we", "they", "his", "her", "its", "our", "their", "your", "my", "this", "that", "these",
+    "those", "there", "here", "what", "who", "where", "when", "why", "how", "which", "not", "yes",
+    "hello", "thanks", "please", "today", "people", "arrived",
+}
+
+# Abbreviations ending in a period that do not end a sentence
+SENTENCE_ABBREVIATIONS = {a for a in (*FI_ABBREVIATIONS, *EN_ABBREVIATIONS) if a.endswith(".")}
+
+def finnish_number(n: int) -> str:
+    if n < 10:
+        return FI_ONES[n]
+    if n == 10:
+        return "kymmenen"
+    if n < 20:
+        return FI_ONES[n - 10] + "toista"
+    if n < 100:
+        tens, ones = divmod(n, 10)
+        return FI_ONES[tens] + "kymmentä" + (FI_ONES[ones] if ones else "")
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        head = "sata" if hundreds == 1 else FI_ONES[hundreds] + "sataa"
+        return head + (finnish_number(rest) if rest else "")
+    if n < 1000000:
+        thousands, rest = divmod(n, 1000)
+        head = "tuhat" if thousands == 1 else finnish_number(thousands) + "tuhatta"
+        return head + (" " + finnish_number(rest) if rest else "")
+    if n < 1000000000:
+        millions, rest = divmod(n, 1000000)
+        head = "miljoona" if millions == 1 else finnish_number(millions) + " miljoonaa"
+        return head + (" " + finnish_number(rest) if rest else "")
+    billions, rest = divmod(n, 1000000000)
+    head = "miljardi" if billions == 1 else finnish_number(billions) + " miljardia"
+    return head + (" " + finnish_number(rest) if rest else "")
+
+def finnish_ordinal(n: int) -> str:
+    """Nominative ordinal for 1-31, enough for days of the month."""
+    if n <= 10:
+        return FI_ORDINALS[n]
+    if n < 20:
+        return FI_ORDINAL_STEMS[n - 10] + "toista"
+    tens, ones = divmod(n, 10)
+    return FI_ORDINAL_STEMS[tens] + "kymmenes" + (FI_ORDINALS[ones] if ones else "")
+
+def english_number(n: int) -> str:
+    if n < 20:
+        return EN_ONES[n]
+    if n < 100:
+        tens, ones = divmod(n, 10)
+        return EN_TENS[tens] + ("-" + EN_ONES[ones] if ones else "")
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        return EN_ONES[hundreds] + " hundred" + (" " + english_number(rest) if rest else "")
+    for size, word in ((1000000000, "billion"), (1000000, "million"), (1000, "thousand")):
+        if n >= size:
+            head, rest = divmod(n, size)
+            return english_number(head) + " " + word + (" " + english_number(rest) if rest else "")
+
+def english_ordinal(n: int) -> str:
+    """Ordinal for 1-31, enough for days of the month."""
+    tens, ones = divmod(n, 10)
+    if n in EN_ORDINALS:
+        return EN_ORDINALS[n]
+    if n < 20:
+        return english_number(n) + "th"
+    if ones == 0:
+        return EN_TENS[tens][:-1] + "ieth"
+    return EN_TENS[tens] + "-" + (EN_ORDINALS.get(ones) or english_number(ones) + "th")
+
+def match_case(matched: str, expansion: str) -> str:
+    """Capitalizes the expansion when the abbreviation it replaces was capitalized."""
+    if matched[:1].isupper():
+        return expansion[:1].upper() + expansion[1:]
+    return expansion
+
+class TextSegmenter:
+    """
+    Shapes reply text for speech synthesis: expands numbers and abbreviations
+    (Finnish or English), then splits it on sentence and clause boundaries.
+    The first segment is kept short so the first audio starts quickly; the
+    rest are packed up to max_chars, the size the engine synthesizes best.
+    """
+    def __init__(self, max_chars: int, first_max_words: int = TTS_FIRST_SEGMENT_MAX_WORDS):
+        self.max_chars = max_chars
+        self.first_max_words = first_max_words
+
+    def detect_language(self, text: str) -> str:
+        if re.search(r"[äöå]", text, re.IGNORECASE):
+            return "fi"
+        words = re.findall(r"[a-zäöå]+", text.lower())
+        finnish = sum(word in FINNISH_HINTS for word in words)
+        english = sum(word in ENGLISH_HINTS for word in words)
+        if finnish != english:
+            return "fi" if finnish > english else "en"
+        return TTS_DEFAULT_LANGUAGE
+
+    def expand_abbreviations(self, text: str, language: str) -> str:
+        abbreviations = FI_ABBREVIATIONS if language == "fi" else EN_ABBREVIATIONS
+        # Currency written before the amount is spoken after it: "$5" -> "5 $"
+        text = re.sub(r"([$€])\s?(\d[\d,. ]*\d|\d)", r"\2 \1", text)
+        for abbreviation, expansion in abbreviations.items():
+            if abbreviation in UNIT_SYMBOLS:
+                # Symbols are spoken after the number they follow: "5 %" -> "5 prosenttia"
+                pattern = r"\s?" + re.escape(abbreviation)
+                expansion = " " + expansion
+            elif abbreviation[-1].isalpha():
+                pattern = r"(?<!\w)" + re.escape(abbreviation) + r"(?!\w)"
+            else:
+                pattern = r"(?<!\w)" + re.escape(abbreviation)
+            text = re.sub(pattern, lambda m, e=expansion: match_case(m.group(0).strip(), e), text,
+                          flags=re.IGNORECASE)
+        return text
+
+    def expand_numbers(self, text: str, language: str) -> str:
+        to_words = finnish_number if language == "fi" else english_number
+        minus, point = ("miinus", "pilkku") if language == "fi" else ("minus", "point")
+        decimal_separator = "," if language == "fi" else r"\."
+
+        # Digit grouping: "1 000 000" (Finnish) or "1,000,000" (English)
+        group_separator = r"[  ]" if language == "fi" else ","
+        text = re.sub(r"\b\d{1,3}(?:" + group_separator + r"\d{3})+\b",
+                      lambda m: re.sub(r"\D", "", m.group(0)), text)
+        text = self.expand_dates(text, language)
+        text = self.expand_ranges(text, language)
+        # Times: "14:30" -> "14 30", and the Finnish "14.30" likewise
+        text = re.sub(r"\b(\d{1,2}):(\d{2})\b", r"\1 \2", text)
+        if language == "fi":
+            text = re.sub(r"\b(\d{1,2})\.(\d{2})\b(?!\.\d)", r"\1 \2", text)
+        else:
+            # "at 10.30" is a time, "costs 10.30" a decimal
+            text = re.sub(r"\b(at|by|until|till|from|after|before|around) (\d{1,2})\.(\d{2})\b(?!\.\d)",
+                          r"\1 \2 \3", text, flags=re.IGNORECASE)
+
+        def replace(match):
+            sign, integer, fraction = match.group(1), match.group(2), match.group(3)
+            words = to_words(int(integer))
+            if fraction:
+                words += f" {point} " + " ".join(to_words(int(digit)) for digit in fraction)
+            return (f"{minus} " if sign else "") + words
+
+        # A leading minus only counts when it does not join a word: "-5", not "COVID-19"
+        pattern = r"(?:(?<![\w-])(-))?(?<!\w)(\d+)(?:" + decimal_separator + r"(\d+))?(?!\w)"
+        return re.sub(pattern, replace, text)
+
+    def expand_dates(self, text: str, language: str) -> str:
+        """Dates written as d.m.yyyy or d.m.: "1.5.2024" -> "ensimmäinen viidettä 2024"."""
+        def replace(match):
+            day, month, year = int(match.group(1)), int(match.group(2)), match.group(3)
+            if not (1 <= day <= 31 and 1 <= month <= 12):
+                return match.group(0)
+            if language == "fi":
+                words = f"{finnish_ordinal(day)} {FI_MONTH_ORDINALS[month]}"
+            else:
+                words = f"the {english_ordinal(day)} of {EN_MONTHS[month]}"
+            # The year is left as digits for the number pass
+            return f"{words} {year}" if year else words
+
+        return re.sub(r"\b(\d{1,2})\.(\d{1,2})\.(\d{4})?(?!\d)", replace, text)
+
+    def expand_ranges(self, text: str, language: str) -> str:
+        """Numbers joined by a hyphen ("10-20", "555-1234") are both read out; English ranges as "to"."""
+        def replace(match):
+            low, high = match.group(1), match.group(2)
+            # A range rises and its ends are of similar size; "555-1234" is a phone number
+            is_range = int(low) < int(high) and (len(low) == len(high) or len(high) <= 3)
+            if language != "fi" and is_range:
+                return f"{low} to {high}"
+            return f"{low}–{high}"
+
+        return re.sub(r"(?<![\w.,])(\d+)[-–](\d+)(?![\w.,]\d)", replace, text)
+
+    def normalize(self, text: str, language: str = None) -> str:
+        language = language or self.detect_language(text)
+        text = self.expand_abbreviations(text, language)
+        text = self.expand_numbers(text, language)
+        text = re.sub(r"[*_#`]", "", text)  # markdown the LLM sometimes adds
+        return re.sub(r"\s+", " ", text).strip()
+
+    def split_sentences(self, text: str) -> list:
+        sentences = []
+        for piece in re.split(r"(?<=[.!?…])\s+", text):
+            if not piece:
+                continue
+            # Not a sentence end after an abbreviation left unexpanded, e.g. "Mr." in Finnish text
+            if sentences and sentences[-1].split()[-1].lower() in SENTENCE_ABBREVIATIONS:
+                sentences[-1] += " " + piece
+            else:
+                sentences.append(piece)
+        return sentences
+
+    def split_clauses(self, sentence: str) -> list:
+        return [c for c in re.split(r"(?<=[,;:—–])\s+", sentence) if c]
+
+    def split_words(self, text: str, max_chars: int) -> list:
+        pieces, current = [], ""
+        for word in text.split():
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}".strip()
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def pack(self, pieces: list) -> list:
+        segments, current = [], ""
+        for piece in pieces:
+            if current and len(current) + 1 + len(piece) > self.max_chars:
+                segments.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}".strip()
+        if current:
+            segments.append(current)
+        return segments
+
+    def segments(self, text: str) -> list:
+        """Returns the normalized text as a list of segments to synthesize in order."""
+        text = self.normalize(text)
+        if not text:
+            return []
+
+        # Break everything down to pieces no longer than max_chars
+        pieces = []
+        for sentence in self.split_sentences(text):
+            if len(sentence) <= self.max_chars:
+                pieces.append(sentence)
+                continue
+            for clause in self.split_clauses(sentence):
+                pieces.extend(self.split_words(clause, self.max_chars) if len(clause) > self.max_chars else [clause])
+
+        # Short first segment: the first clause, cut to first_max_words words
+        first = self.split_clauses(pieces[0])[0]
+        first_words = first.split()
+        if len(first_words) > self.first_max_words:
+            first = " ".join(first_words[:self.first_max_words])
+        rest = pieces[0][len(first):].strip()
+        remaining = ([rest] if rest else []) + pieces[1:]
+
+        segments = [first] + self.pack(remaining)
+        logger.debug(f"TextSegmenter: Split text into {len(segments)} segments: {segments}")
+        return segments
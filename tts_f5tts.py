@@ -1,10 +1,12 @@
 
 import time
 import traceback
-import subprocess
 from state import State
-from config import AUDIO_DEVICE_OUTPUT_ID, VOICE_SAMPLE_WAV, VOICE_SAMPLE_TXT, VOCAB_TXT
+from config import AUDIO_DEVICE_OUTPUT_ID, VOICE_SAMPLE_WAV, VOICE_SAMPLE_TXT, VOCAB_TXT, VOICE_PRELOAD, TTS_SEGMENT_MAX_CHARS
 from logger import logger
+from text_segmenter import TextSegmenter
+from metrics import metrics
+from voice_cache import VoiceCache, REFERENCE_WAV
 import os
 from huggingface_hub import hf_hub_download
 import sounddevice as sd
@@ -15,9 +17,11 @@ class F5TTSModule:
         logger.info("F5TTSModule: Initializing F5-TTS module.")
         self.state = state
         self.output_device_index = AUDIO_DEVICE_OUTPUT_ID
-        self.voice_sample_wav = VOICE_SAMPLE_WAV
-        with open(VOICE_SAMPLE_TXT, "r", encoding="utf-8") as f:
-            self.voice_sample_txt = f.read()
+        self.segmenter = TextSegmenter(TTS_SEGMENT_MAX_CHARS["f5tts"])
+        self.voice_cache = VoiceCache("f5tts")
+        for wav_path, txt_path in VOICE_PRELOAD:
+            self.load_voice(wav_path, txt_path)
+        self.set_voice(VOICE_SAMPLE_WAV, VOICE_SAMPLE_TXT)
         self.vocab_txt = VOCAB_TXT
         self.audio_dir = os.path.join("generated", "audio", "f5tts")
         os.makedirs(self.audio_dir, exist_ok=True)
@@ -29,6 +33,37 @@ class F5TTSModule:
             cache_dir=os.path.join("models", "f5tts"),
         )
         logger.info(f"F5TTSModule: Model file downloaded to {self.model_path}")
+        # Imported here: f5_tts pulls in torch, which main.py (and every spawned
+        # worker re-importing it) should not pay for when another backend is used.
+        from f5_tts.api import F5TTS
+        # Load the model once and keep it resident; every segment reuses it.
+        self.model = F5TTS(model="F5TTS_v1_Base", ckpt_file=self.model_path, vocab_file=self.vocab_txt)
+        logger.info("F5TTSModule: F5-TTS model loaded successfully.")
+        metrics.mark_warmup("tts")
+
+    def prepare_reference(self, wav_path: str, text: str, entry_dir: str):
+        """
+        Clips and silence-trims the reference voice and normalizes its transcript
+        once, and stores the prepared clip in the voice cache. Inference reads
+        the prepared clip directly, so this preprocessing is not repeated.
+        """
+        from f5_tts.infer.utils_infer import preprocess_ref_audio_text
+        ref_audio_path, ref_text = preprocess_ref_audio_text(wav_path, text)
+        audio, sample_rate = sf.read(ref_audio_path, dtype='float32')
+        sf.write(os.path.join(entry_dir, REFERENCE_WAV), audio, sample_rate)
+        return {"text": ref_text, "sample_rate": sample_rate, "source": wav_path}
+
+    def load_voice(self, wav_path: str, txt_path: str):
+        with open(txt_path, "r", encoding="utf-8") as f:
+            text = f.read()
+        return self.voice_cache.get(wav_path, text, self.prepare_reference)
+
+    def set_voice(self, wav_path: str, txt_path: str):
+        """Switches the reference voice; cached voices skip reference preprocessing."""
+        entry = self.load_voice(wav_path, txt_path)
+        self.voice_sample_wav = os.path.join(entry["dir"], REFERENCE_WAV)
+        self.voice_sample_txt = entry["meta"]["text"]
+        logger.info(f"F5TTSModule: Voice set to {wav_path} ({entry['key']}).")
 
     def audio_started(self):
         self.state.ai_talking = True
@@ -40,15 +75,16 @@ class F5TTSModule:
         logger.info("F5TTSModule: Audio ended (AI is done speaking).")
 
     def compute_speed(self, text):
+        """Slows down very short replies; computed once per reply so the speed does not change mid-reply."""
         word_count = len(text.split())
         if word_count == 2:
-            return "0.4"
+            return 0.4
         elif word_count == 3:
-            return "0.6"
+            return 0.6
         elif word_count == 4:
-            return "0.8"
+            return 0.8
         else:
-            return "1"
+            return 1.0
 
     def speak(self, text: str):
         if not text.strip():
@@ -56,42 +92,56 @@ class F5TTSModule:
             return
 
         logger.info(f"F5TTSModule: Speaking text: {text}")
+        started = False
+        speed = self.compute_speed(text)
         try:
-            # Generate audio file using F5-TTS CLI
-            filename = f"f5tts_{int(time.time()*1000)}.wav"
-            filepath = os.path.join(self.audio_dir, filename)
-            command = [
-                "f5-tts_infer-cli",
-                "--model", "F5TTS_v1_Base",
-                "--ckpt_file", self.model_path,
-                "--gen_text", text,
-                "-o", self.audio_dir,
-                "-w", filename,
-                "-v", self.vocab_txt,
-                "--ref_text", self.voice_sample_txt,
-                "--ref_audio", self.voice_sample_wav,
-                "--speed", self.compute_speed(text),
-            ]
-            logger.debug(f"F5TTSModule: Running command: {' '.join(command)}")
-            result = subprocess.run(command, check=True, capture_output=True)
-            logger.info(f"F5TTSModule: Audio generated at {filepath}")
-            self.audio_started()
-            # Play the audio file using the output device
-            self.play_audio(filepath)
-            self.audio_ended()
-        except subprocess.CalledProcessError as e:
-            logger.error(f"F5TTSModule: Error generating audio: {e}")
-            logger.debug(e.stderr.decode())
+            for index, segment in enumerate(self.segmenter.segments(text)):
+                audio, sample_rate = self.synthesize(segment, speed=speed)
+                filename = f"f5tts_{int(time.time()*1000)}_{index}.wav"
+                filepath = os.path.join(self.audio_dir, filename)
+                sf.write(filepath, audio, sample_rate)
+                logger.info(f"F5TTSModule: Audio generated at {filepath}")
+                # The segment was generated while the previous one was playing
+                sd.wait()
+                if not started:
+                    self.audio_started()
+                    started = True
+                # Play the audio file using the output device
+                self.play_audio(filepath, wait=False)
+            sd.wait()
         except Exception as e:
             logger.error(f"F5TTSModule: Error during F5-TTS playback: {e}")
             logger.debug(traceback.format_exc())
+        finally:
+            if started:
+                self.audio_ended()
+
+    def synthesize(self, text: str, speed: float = 1.0):
+        """
+        Synthesizes text into a mono float32 array without playing it.
+        Returns (audio, sample_rate).
+        """
+        from f5_tts.infer.utils_infer import infer_process
+        start = time.time()
+        audio, sample_rate, _ = infer_process(
+            self.voice_sample_wav,
+            self.voice_sample_txt,
+            text,
+            self.model.ema_model,
+            self.model.vocoder,
+            mel_spec_type=self.model.mel_spec_type,
+            speed=speed,
+        )
+        metrics.observe_tts(time.time() - start, len(audio) / sample_rate)
+        return audio, sample_rate
 
-    def play_audio(self, filepath):
+    def play_audio(self, filepath, wait=True):
         logger.info(f"F5TTSModule: Playing audio file {filepath} on device {self.output_device_index}")
         try:
             data, samplerate = sf.read(filepath, dtype='float32')
             sd.play(data, samplerate, device=self.output_device_index)
-            sd.wait()  # Wait until playback is finished
+            if wait:
+                sd.wait()  # Wait until playback is finished
         except Exception as e:
             logger.error(f"F5TTSModule: Error playing audio: {e}")
 
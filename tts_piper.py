@@ -2,8 +2,10 @@ import time
 import traceback
 import os
 from state import State
-from config import AUDIO_DEVICE_OUTPUT_ID
+from config import AUDIO_DEVICE_OUTPUT_ID, TTS_SEGMENT_MAX_CHARS
 from logger import logger
+from text_segmenter import TextSegmenter
+from metrics import metrics
 from huggingface_hub import hf_hub_download
 from piper import PiperVoice, SynthesisConfig
 import sounddevice as sd
@@ -16,6 +18,7 @@ class PiperTTSModule:
         logger.info("PiperTTSModule: Initializing Piper TTS module.")
         self.state = state
         self.output_device_index = AUDIO_DEVICE_OUTPUT_ID
+        self.segmenter = TextSegmenter(TTS_SEGMENT_MAX_CHARS["piper"])
         self.audio_dir = os.path.join("generated", "audio", "piper")
         os.makedirs(self.audio_dir, exist_ok=True)
         logger.info(f"PiperTTSModule: Audio output directory set to {self.audio_dir}")
@@ -37,6 +40,7 @@ class PiperTTSModule:
         try:
             self.voice = PiperVoice.load(self.model_path, use_cuda=True)
             logger.info("PiperTTSModule: PiperVoice loaded successfully.")
+            metrics.mark_warmup("tts")
         except Exception as e:
             logger.error(f"PiperTTSModule: Failed to load PiperVoice: {e}")
             self.voice = None
@@ -58,40 +62,60 @@ class PiperTTSModule:
             logger.debug("PiperTTSModule: Empty text provided to speak; ignoring.")
             return
         logger.info(f"PiperTTSModule: Speaking text: {text}")
+        started = False
         try:
-            filename = f"piper_{int(time.time()*1000)}.wav"
-            filepath = os.path.join(self.audio_dir, filename)
-            syn_config = SynthesisConfig(
-                volume=1.0,
-                noise_scale=0.5,
-                noise_w_scale=0.5,
-                normalize_audio=True,
-            )
-            audio_chunks = self.voice.synthesize(text, syn_config=syn_config)
-            audio_arrays = []
-            sample_rate = None
-            for chunk in audio_chunks:
-                if sample_rate is None:
-                    sample_rate = chunk.sample_rate
-                audio_arrays.append(chunk.audio_float_array)
-            audio = np.concatenate(audio_arrays)
-            if len(audio.shape) == 1:
-                audio = np.expand_dims(audio, axis=1)
-            sf.write(filepath, audio, sample_rate)
-            logger.info(f"PiperTTSModule: Audio generated at {filepath}")
-            self.audio_started()
-            self.play_audio(filepath)
-            self.audio_ended()
+            for index, segment in enumerate(self.segmenter.segments(text)):
+                audio, sample_rate = self.synthesize(segment)
+                filename = f"piper_{int(time.time()*1000)}_{index}.wav"
+                filepath = os.path.join(self.audio_dir, filename)
+                if len(audio.shape) == 1:
+                    audio = np.expand_dims(audio, axis=1)
+                sf.write(filepath, audio, sample_rate)
+                logger.info(f"PiperTTSModule: Audio generated at {filepath}")
+                # The segment was synthesized while the previous one was playing
+                sd.wait()
+                if not started:
+                    self.audio_started()
+                    started = True
+                self.play_audio(filepath, wait=False)
+            sd.wait()
         except Exception as e:
             logger.error(f"PiperTTSModule: Error during Piper TTS playback: {e}")
             logger.debug(traceback.format_exc())
+        finally:
+            if started:
+                self.audio_ended()
 
-    def play_audio(self, filepath):
+    def synthesize(self, text: str):
+        """
+        Synthesizes text into a mono float32 array without playing it.
+        Returns (audio, sample_rate).
+        """
+        syn_config = SynthesisConfig(
+            volume=1.0,
+            noise_scale=0.5,
+            noise_w_scale=0.5,
+            normalize_audio=True,
+        )
+        start = time.time()
+        audio_chunks = self.voice.synthesize(text, syn_config=syn_config)
+        audio_arrays = []
+        sample_rate = None
+        for chunk in audio_chunks:
+            if sample_rate is None:
+                sample_rate = chunk.sample_rate
+            audio_arrays.append(chunk.audio_float_array)
+        audio = np.concatenate(audio_arrays)
+        metrics.observe_tts(time.time() - start, len(audio) / sample_rate)
+        return audio, sample_rate
+
+    def play_audio(self, filepath, wait=True):
         logger.info(f"PiperTTSModule: Playing audio file {filepath} on device {self.output_device_index}")
         try:
             data, samplerate = sf.read(filepath, dtype='float32')
             sd.play(data, samplerate, device=self.output_device_index)
-            sd.wait()
+            if wait:
+                sd.wait()
         except Exception as e:
             logger.error(f"PiperTTSModule: Error playing audio: {e}")
 
@@ -1,21 +1,37 @@
 import time
 import traceback
 from state import State
-from config import AUDIO_DEVICE_OUTPUT_ID, VOICE_SAMPLE_WAV
+from config import AUDIO_DEVICE_OUTPUT_ID, VOICE_SAMPLE_WAV, VOICE_PRELOAD, TTS_SEGMENT_MAX_CHARS
 from RealtimeTTS import TextToAudioStream, CoquiEngine
 from logger import logger
+from text_segmenter import TextSegmenter
+from metrics import metrics
+from voice_cache import VoiceCache
 
 class TTSModule:
     def __init__(self, state: State):
         logger.info("TTSModule: Initializing TTS module.")
         self.state = state
+        self.segmenter = TextSegmenter(TTS_SEGMENT_MAX_CHARS["coqui"])
+        # CoquiEngine stores the computed speaker latents next to the voice file,
+        # so hand it a content-keyed copy to make that cache follow the WAV content.
+        self.voice_cache = VoiceCache("coqui")
+        voice_path = self.voice_cache.reference_path(VOICE_SAMPLE_WAV)
         try:
             engine = CoquiEngine(
                 use_deepspeed=True,
-                voice=VOICE_SAMPLE_WAV,
+                voice=voice_path,
                 speed=1,
             )
+            self.engine = engine
             logger.info("TTSModule: CoquiEngine initialized successfully.")
+            # Selecting each preloaded voice once makes the engine compute and store
+            # its latents now rather than on the first switch to it.
+            if VOICE_PRELOAD:
+                for wav_path, _ in VOICE_PRELOAD:
+                    engine.set_voice(self.voice_cache.reference_path(wav_path))
+                    logger.info(f"TTSModule: Preloaded voice {wav_path}.")
+                engine.set_voice(voice_path)
         except Exception as e:
             logger.error(f"TTSModule: Failed to initialize CoquiEngine: {e}")
             self.stream = None
@@ -30,11 +46,24 @@ class TTSModule:
         try:
             self.stream = TextToAudioStream(engine, **tts_config)
             logger.info("TTSModule: TextToAudioStream initialized successfully.")
+            metrics.mark_warmup("tts")
         except Exception as e:
             logger.error(f"TTSModule: Failed to initialize TextToAudioStream: {e}")
             self.stream = None
             return
 
+    def set_voice(self, wav_path: str):
+        """Switches the reference voice; previously used voices load their cached latents."""
+        if not self.stream:
+            logger.warning("TTSModule: TextToAudioStream not initialized. Cannot set voice.")
+            return
+        try:
+            self.engine.set_voice(self.voice_cache.reference_path(wav_path))
+            logger.info(f"TTSModule: Voice set to {wav_path}.")
+        except Exception as e:
+            logger.error(f"TTSModule: Error setting voice: {e}")
+            logger.debug(traceback.format_exc())
+
     def audio_started(self):
         self.state.ai_talking = True
         logger.info("TTSModule: Audio started (AI is speaking).")
@@ -55,7 +84,8 @@ class TTSModule:
 
         logger.info(f"TTSModule: Speaking text: {text}")
         try:
-            self.stream.feed(text)
+            # The stream concatenates what it is fed, so keep the spaces between segments
+            self.stream.feed(" ".join(self.segmenter.segments(text)))
             self.stream.play_async()
             logger.debug("TTSModule: Text fed to TTS stream and playback started.")
         except Exception as e:
@@ -0,0 +1,64 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import time
+from logger import logger
+from state import State
+
+# Usage (from the repository root so the model caches are shared):
+#   python utils/benchmark_tts.py [piper|f5tts] [runs]
+# Compares synthesizing the whole reply at once (previous behavior) against
+# synthesizing it segment by segment. For the segmented path it reports the
+# time to first audio and the silence between segments: each segment is
+# synthesized while the previous one plays, so there is a gap whenever
+# synthesis takes longer than the previous segment's audio.
+
+REPLIES = [
+    "Hei! Kello on nyt 14:30, ja ulkona on -3,5 astetta, joten pukeudu lämpimästi ennen kuin lähdet ulos.",
+    "Se on hyvä kysymys. Esim. 25 % suomalaisista käyttää tekoälyä päivittäin, mutta luku kasvaa koko ajan, "
+    "ja ensi vuonna se voi olla jo yli 40 %.",
+    "Well, that is a great question. The answer is 42, e.g. the meaning of life, the universe and everything.",
+]
+
+backend = sys.argv[1] if len(sys.argv) > 1 else "piper"
+runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+state = State()
+if backend == "f5tts":
+    from tts_f5tts import F5TTSModule
+    tts_module = F5TTSModule(state)
+else:
+    from tts_piper import PiperTTSModule
+    tts_module = PiperTTSModule(state)
+
+# Warm-up so model loading is not counted
+tts_module.synthesize("Hei.")
+
+def timed_synthesis(text):
+    start = time.perf_counter()
+    audio, sample_rate = tts_module.synthesize(text)
+    return time.perf_counter() - start, len(audio) / sample_rate
+
+for reply in REPLIES:
+    whole_times, first_times, gap_totals = [], [], []
+    for _ in range(runs):
+        whole_times.append(timed_synthesis(reply)[0])
+
+        start = time.perf_counter()
+        segments = tts_module.segmenter.segments(reply)
+        first_seconds, previous_audio_seconds = timed_synthesis(segments[0])
+        first_times.append(time.perf_counter() - start)
+        gaps = 0.0
+        for segment in segments[1:]:
+            synthesis_seconds, audio_seconds = timed_synthesis(segment)
+            gaps += max(0.0, synthesis_seconds - previous_audio_seconds)
+            previous_audio_seconds = audio_seconds
+        gap_totals.append(gaps)
+
+    whole = min(whole_times)
+    first = min(first_times)
+    logger.info(f"Reply: {reply}")
+    logger.info(f"  Segments: {segments}")
+    logger.info(f"  Time to first audio, whole reply: {whole * 1000:.0f} ms")
+    logger.info(f"  Time to first audio, segmented:   {first * 1000:.0f} ms ({whole / first:.1f}x faster)")
+    logger.info(f"  Gaps between segments, segmented: {min(gap_totals) * 1000:.0f} ms in total")
@@ -0,0 +1,90 @@
+import os
+import json
+import shutil
+import hashlib
+from config import VOICE_CACHE_DIR
+from logger import logger
+
+REFERENCE_WAV = "reference.wav"
+META_JSON = "meta.json"
+
+class VoiceCache:
+    """
+    On-disk cache of what a TTS backend derives from a reference voice
+    (a prepared reference clip, or the engine's own latent files).
+    Entries are keyed by a content hash of the reference WAV and transcript,
+    so editing a voice sample invalidates its entry while renaming it does not.
+    """
+    def __init__(self, backend: str, cache_dir: str = VOICE_CACHE_DIR):
+        self.backend = backend
+        self.cache_dir = os.path.join(cache_dir, backend)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.entries = {}
+        logger.info(f"VoiceCache: Using {self.cache_dir} for {backend} voice conditioning.")
+
+    def voice_key(self, wav_path: str, text: str = "") -> str:
+        digest = hashlib.sha256()
+        with open(wav_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digest.update(b"\0")
+        digest.update(text.strip().encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key: str):
+        """Returns a cached entry, or None if it is not on disk."""
+        if key in self.entries:
+            return self.entries[key]
+        entry_dir = self.entry_dir(key)
+        meta_path = os.path.join(entry_dir, META_JSON)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        entry = {"key": key, "dir": entry_dir, "meta": meta}
+        self.entries[key] = entry
+        logger.debug(f"VoiceCache: Loaded cached voice {key}.")
+        return entry
+
+    def save(self, key: str, meta: dict):
+        entry_dir = self.entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        # Write the metadata last; its presence marks the entry as complete.
+        with open(os.path.join(entry_dir, META_JSON), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        logger.info(f"VoiceCache: Saved voice conditioning {key}.")
+        return self.load(key)
+
+    def get(self, wav_path: str, text: str, compute):
+        """
+        Returns the cached entry for the voice, calling compute(wav_path, text, entry_dir)
+        to derive it on a miss. compute writes its files into entry_dir and returns
+        the metadata to store with them.
+        """
+        key = self.voice_key(wav_path, text)
+        entry = self.load(key)
+        if entry is not None:
+            logger.info(f"VoiceCache: Using cached conditioning for {wav_path} ({key}).")
+            return entry
+        logger.info(f"VoiceCache: No cached conditioning for {wav_path}; computing ({key}).")
+        os.makedirs(self.entry_dir(key), exist_ok=True)
+        meta = compute(wav_path, text, self.entry_dir(key))
+        return self.save(key, meta)
+
+    def reference_path(self, wav_path: str, text: str = "") -> str:
+        """
+        Copies the reference WAV into its content-keyed entry and returns the copy's path.
+        Engines that keep their own conditioning files next to the voice file then
+        cache per content instead of per filename.
+        """
+        key = self.voice_key(wav_path, text)
+        entry_dir = self.entry_dir(key)
+        path = os.path.join(entry_dir, REFERENCE_WAV)
+        if not os.path.exists(path):
+            os.makedirs(entry_dir, exist_ok=True)
+            shutil.copyfile(wav_path, path)
+            logger.info(f"VoiceCache: Stored reference voice {wav_path} as {key}.")
+        return path
@@ -0,0 +1,257 @@
+import time
+import queue
+import signal
+import threading
+import traceback
+import multiprocessing
+from state import SharedState
+from config import AUDIO_DEVICE_INPUT_ID, AUDIO_DEVICE_OUTPUT_ID, STT_SAMPLE_RATE, AUDIO_RING_SECONDS
+from audio_ring import AudioRingBuffer
+from logger import logger
+from metrics import metrics
+
+# TTS output rings are sized for the highest sample rate we expect from a backend.
+TTS_RING_SAMPLE_RATE = 48000
+
+def stt_worker(state: SharedState, audio_ring: AudioRingBuffer, sample_rate: int, status_queue):
+    """Entry point of the STT process: transcribes audio read from the shared ring."""
+    # Ctrl+C is handled by the main process, which flips the shared shutdown flag.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from stt_realtimestt import STTModule
+    logger.info("Workers: STT worker process started.")
+    stt_module = STTModule(state, audio_ring=audio_ring, audio_sample_rate=sample_rate)
+    if stt_module.recorder:
+        # Metrics live in the main process; report the model load there.
+        status_queue.put("stt")
+    stt_module.run()
+    audio_ring.close()
+    logger.info("Workers: STT worker process exiting.")
+
+def tts_loaded(tts_module) -> bool:
+    """Piper leaves voice, and Coqui leaves stream, as None when loading fails."""
+    return all(getattr(tts_module, attribute, True) is not None for attribute in ("voice", "stream"))
+
+def tts_worker(state: SharedState, tts_class, request_queue, event_queue, audio_ring: AudioRingBuffer, status_queue):
+    """
+    Entry point of the TTS process. Backends that can synthesize without playing
+    write their audio into the shared ring and the main process plays it back;
+    other backends (e.g. the Coqui stream) play directly from this process.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logger.info(f"Workers: TTS worker process started with {tts_class.__name__}.")
+    tts_module = tts_class(state)
+    if tts_loaded(tts_module):
+        status_queue.put("tts")
+    can_synthesize = hasattr(tts_module, "synthesize")
+    while not state.shutdown:
+        try:
+            text = request_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if not can_synthesize:
+            tts_module.speak(text)
+            # Report the end even when speak() played nothing (no stream, empty
+            # text, an error), since the proxy marked the AI as talking on send.
+            stream = getattr(tts_module, "stream", None)
+            while stream is not None and stream.is_playing() and not state.shutdown:
+                time.sleep(0.05)
+            event_queue.put(("end", 0, 0, 0))
+            continue
+        # Backends that adapt the speaking rate to the reply set it once for all its segments
+        options = {"speed": tts_module.compute_speed(text)} if hasattr(tts_module, "compute_speed") else {}
+        try:
+            # Stream segment by segment so playback starts after the first short one
+            for segment in tts_module.segmenter.segments(text):
+                start = time.time()
+                audio, sample_rate = tts_module.synthesize(segment, **options)
+                event_queue.put(("audio", sample_rate, len(audio), time.time() - start))
+                audio_ring.write(audio, should_stop=lambda: state.shutdown)
+            event_queue.put(("end", 0, 0, 0))
+        except Exception as e:
+            logger.error(f"Workers: Error during TTS synthesis: {e}")
+            logger.debug(traceback.format_exc())
+            event_queue.put(("error", 0, 0, 0))
+    audio_ring.close()
+    logger.info("Workers: TTS worker process exiting.")
+
+class MicrophoneCapture:
+    """Captures microphone audio in the main process and writes it into the STT ring."""
+    def __init__(self, state: SharedState, audio_ring: AudioRingBuffer, sample_rate: int):
+        self.state = state
+        self.audio_ring = audio_ring
+        self.sample_rate = sample_rate
+
+    @staticmethod
+    def device_sample_rate() -> int:
+        """
+        The input device's default rate. Many devices cannot open at 16 kHz, so audio is
+        captured at this rate and the recorder resamples it (feed_audio's original_sample_rate).
+        """
+        try:
+            import sounddevice as sd
+            return int(sd.query_devices(AUDIO_DEVICE_INPUT_ID, 'input')['default_samplerate'])
+        except Exception as e:
+            logger.warning(f"MicrophoneCapture: Could not query input device {AUDIO_DEVICE_INPUT_ID}; "
+                           f"using {STT_SAMPLE_RATE} Hz: {e}")
+            return STT_SAMPLE_RATE
+
+    def callback(self, indata, frames, time_info, status):
+        if status:
+            logger.debug(f"MicrophoneCapture: Input stream status: {status}")
+        # Never block the audio callback; drop frames if the STT process falls behind.
+        self.audio_ring.write(indata[:, 0], block=False)
+
+    def run(self):
+        import sounddevice as sd
+        logger.info(f"MicrophoneCapture: Capturing from device {AUDIO_DEVICE_INPUT_ID} at {self.sample_rate} Hz.")
+        try:
+            with sd.InputStream(device=AUDIO_DEVICE_INPUT_ID, samplerate=self.sample_rate, channels=1,
+                                dtype='int16', blocksize=512, callback=self.callback):
+                while not self.state.shutdown:
+                    time.sleep(0.1)
+        except Exception as e:
+            logger.error(f"MicrophoneCapture: Error during audio capture: {e}")
+            logger.debug(traceback.format_exc())
+        finally:
+            logger.info("MicrophoneCapture: Exiting audio capture.")
+
+class TTSProcessProxy:
+    """
+    Stands in for a TTS module in the main process. speak() hands the text to the
+    TTS worker process; run() plays back audio the worker writes into the shared ring.
+    """
+    def __init__(self, state: SharedState, request_queue, event_queue, audio_ring: AudioRingBuffer):
+        logger.info("TTSProcessProxy: Initializing TTS process proxy.")
+        self.state = state
+        self.request_queue = request_queue
+        self.event_queue = event_queue
+        self.audio_ring = audio_ring
+        self.output_device_index = AUDIO_DEVICE_OUTPUT_ID
+
+    def audio_started(self):
+        self.state.ai_talking = True
+        logger.info("TTSProcessProxy: Audio started (AI is speaking).")
+
+    def audio_ended(self):
+        self.state.ai_talking = False
+        self.state.last_message_timestamp = time.time()
+        logger.info("TTSProcessProxy: Audio ended (AI is done speaking).")
+
+    def speak(self, text: str):
+        if not text.strip():
+            logger.debug("TTSProcessProxy: Empty text provided to speak; ignoring.")
+            return
+        logger.info(f"TTSProcessProxy: Sending text to TTS process: {text}")
+        # Mark the AI as talking right away so the orchestrator does not prompt
+        # again while the worker is still synthesizing.
+        self.audio_started()
+        self.request_queue.put(text)
+
+    def play_stream(self, sample_rate: int, total_frames: int):
+        import sounddevice as sd
+        logger.info(f"TTSProcessProxy: Playing {total_frames} frames on device {self.output_device_index}")
+        consumed = 0
+        try:
+            with sd.OutputStream(samplerate=sample_rate, channels=1, dtype='float32',
+                                 device=self.output_device_index) as stream:
+                while consumed < total_frames and not self.state.shutdown:
+                    chunk = self.audio_ring.read(min(4096, total_frames - consumed))
+                    if len(chunk) == 0:
+                        time.sleep(0.005)
+                        continue
+                    consumed += len(chunk)
+                    stream.write(chunk.reshape(-1, 1))
+        finally:
+            # Whatever stays of this segment in the ring would play as the start of the next one
+            self.discard(total_frames - consumed)
+
+    def discard(self, frames: int):
+        """Reads and drops frames from the ring."""
+        if frames > 0:
+            logger.warning(f"TTSProcessProxy: Discarding {frames} unplayed frames.")
+        while frames > 0 and not self.state.shutdown:
+            chunk = self.audio_ring.read(min(4096, frames))
+            if len(chunk) == 0:
+                time.sleep(0.005)
+                continue
+            frames -= len(chunk)
+
+    def run(self):
+        logger.info("TTSProcessProxy: Running TTS playback.")
+        try:
+            while not self.state.shutdown:
+                try:
+                    kind, sample_rate, total_frames, synthesis_seconds = self.event_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if kind == "audio":
+                    metrics.observe_tts(synthesis_seconds, total_frames / sample_rate)
+                    try:
+                        self.play_stream(sample_rate, total_frames)
+                    except Exception as e:
+                        logger.error(f"TTSProcessProxy: Error playing audio: {e}")
+                        logger.debug(traceback.format_exc())
+                else:
+                    self.audio_ended()
+        finally:
+            logger.info("TTSProcessProxy: Exiting TTS playback.")
+
+class WorkerProcesses:
+    """Creates the shared rings and queues and starts the STT and TTS worker processes."""
+    def __init__(self, state: SharedState, tts_class, context=None):
+        # Spawn (not fork) so that the state and rings are pickled into the workers,
+        # which is what turns them into mirrors that never unlink the shared memory.
+        context = context or multiprocessing.get_context("spawn")
+        self.state = state
+        mic_sample_rate = MicrophoneCapture.device_sample_rate()
+        self.stt_ring = AudioRingBuffer(capacity=mic_sample_rate * AUDIO_RING_SECONDS, dtype="int16", create=True)
+        self.tts_ring = AudioRingBuffer(capacity=TTS_RING_SAMPLE_RATE * AUDIO_RING_SECONDS, dtype="float32", create=True)
+        request_queue = context.Queue()
+        event_queue = context.Queue()
+        # Workers report finished model loads here; see watch_status()
+        self.status_queue = context.Queue()
+
+        self.tts_proxy = TTSProcessProxy(state, request_queue, event_queue, self.tts_ring)
+        self.microphone = MicrophoneCapture(state, self.stt_ring, mic_sample_rate)
+        # Not daemonic: RealtimeSTT and CoquiEngine start processes of their own,
+        # which daemonic processes may not do. stop() joins or terminates them.
+        self.processes = [
+            context.Process(target=stt_worker, args=(state, self.stt_ring, mic_sample_rate, self.status_queue),
+                            name="STTProcess"),
+            context.Process(target=tts_worker,
+                            args=(state, tts_class, request_queue, event_queue, self.tts_ring, self.status_queue),
+                            name="TTSProcess"),
+        ]
+        self.threads = [
+            threading.Thread(target=state.pump_messages, name="MessagePumpThread", daemon=True),
+            threading.Thread(target=self.microphone.run, name="MicrophoneThread", daemon=True),
+            threading.Thread(target=self.tts_proxy.run, name="TTSPlaybackThread", daemon=True),
+            threading.Thread(target=self.watch_status, name="WorkerStatusThread", daemon=True),
+        ]
+
+    def watch_status(self):
+        """Records model loads reported by the worker processes in the main metrics registry."""
+        while not self.state.shutdown:
+            try:
+                model = self.status_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            logger.info(f"Workers: {model.upper()} model loaded in worker process.")
+            metrics.mark_warmup(model)
+
+    def start(self):
+        for process in self.processes:
+            logger.info(f"Workers: Starting {process.name}.")
+            process.start()
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self.state.shutdown = True
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"Workers: {process.name} did not exit in time; terminating.")
+                process.terminate()
+        self.stt_ring.close()
+        self.tts_ring.close()